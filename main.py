@@ -1,11 +1,16 @@
 import os
-import json
-import traceback
+import asyncio
+import logging
+import re
+import ssl
 import hmac
 import hashlib
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, WebSocket, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Response, WebSocket, HTTPException
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from twilio.twiml.voice_response import VoiceResponse, Connect
 from elevenlabs import ElevenLabs
 from elevenlabs.conversational_ai.conversation import Conversation
@@ -13,11 +18,19 @@ from elevenlabs import ConversationInitiationClientDataRequestInput
 from twilio_audio_interface import TwilioAudioInterface
 from starlette.websockets import WebSocketDisconnect
 from supabase import create_client, Client
+import aiohttp
+import cachetools
 import httpx
+import orjson
 import datetime
 
 load_dotenv()
 
+# Verbose payload dumps go to DEBUG so production isn't paying for
+# multi-KB f-strings and unbuffered stdio writes on every request
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+log = logging.getLogger("app")
+
 # Load environment variables
 ELEVENLABS_AGENT_ID = os.getenv("ELEVENLABS_AGENT_ID")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
@@ -26,71 +39,214 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 ELEVENLABS_AGENT_PHONE_ID = os.getenv("ELEVENLABS_AGENT_PHONE_ID")
 
-# Initialize Supabase client with the service_role key
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Memoized client singletons so repeated connections don't rebuild
+# underlying HTTP sessions and auth state
+@lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+@lru_cache(maxsize=1)
+def get_eleven() -> ElevenLabs:
+    return ElevenLabs(api_key=ELEVENLABS_API_KEY)
+
+# Supabase client with the service_role key
+supabase: Client = get_supabase()
+
+# Build the SSL context once at startup so each client doesn't pay the setup cost
+SSL_CONTEXT = ssl.create_default_context()
+
+# Precompute the webhook HMAC state once; per-request verification copies it
+# instead of re-deriving the SHA-256 key schedule every time
+_WEBHOOK_KEY = WEBHOOK_SECRET.encode("utf-8") if WEBHOOK_SECRET else b""
+_HMAC_TEMPLATE = hmac.new(_WEBHOOK_KEY, digestmod=hashlib.sha256)
+
+# Display names for transcript roles, so we don't call str.capitalize()
+# on every entry of a long transcript
+_ROLE_CAP = {"agent": "Agent", "user": "User", "unknown": "Unknown"}
+
+# Buckets a medication's time_taken entries can fall into
+_MED_BUCKETS = ("morning", "afternoon", "evening")
+
+# Hour -> time-of-day lookup: 5-11 morning, 12-16 afternoon, otherwise evening
+_TIME_OF_DAY = ("evening",) * 5 + ("morning",) * 7 + ("afternoon",) * 5 + ("evening",) * 7
 
-# Initialize ElevenLabs client
-eleven_labs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+# Phone numbers arrive with spaces, dashes, parens etc.; a single compiled
+# regex pass strips everything except digits and '+'
+_PHONE_RE = re.compile(r"[^\d+]")
 
-app = FastAPI()
+def norm_phone(phone_number: str) -> str:
+    normalized = _PHONE_RE.sub("", phone_number)
+    return normalized if normalized.startswith("+") else "+" + normalized
+
+async def sb(fn):
+    """
+    Runs a blocking supabase-py call in a worker thread. supabase-py is
+    synchronous, so calling it inline would stall the event loop for the
+    whole round-trip and serialize concurrent webhooks.
+    """
+    return await asyncio.to_thread(fn)
+
+# Profiles are read on every call but change rarely. Entries are
+# (profile, fetched_at) tuples: fresh for PROFILE_FRESH_SECONDS, after which
+# they're served stale while a background task revalidates, up to the TTL
+PROFILE_CACHE = cachetools.TTLCache(maxsize=1024, ttl=360)
+PROFILE_CACHE_LOCK = asyncio.Lock()
+PROFILE_FRESH_SECONDS = 60
+_PROFILE_REFRESHING: set[str] = set()
+
+# Matching headers so any CDN or reverse proxy in front can do the same
+CACHE_CONTROL_SWR = "public, max-age=60, stale-while-revalidate=300"
+
+# Caller names, for the agent's repeated lookups during a conversation
+NAME_CACHE = cachetools.TTLCache(maxsize=4096, ttl=60)
+
+# The same callers hit the call-end webhook over and over, so remember their
+# phone_number -> user_id mapping for an hour
+USER_ID_CACHE = cachetools.TTLCache(maxsize=4096, ttl=3600)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP client so outbound calls reuse keep-alive connections
+    # instead of paying a TCP+TLS handshake per request
+    app.state.http_client = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        verify=SSL_CONTEXT,
+    )
+    # aiohttp session for the hot outbound path; its C-accelerated parser has
+    # lower per-request overhead than httpx under concurrent calls
+    app.state.aio_session = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=10),
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+    )
+    yield
+    await app.state.aio_session.close()
+    await app.state.http_client.aclose()
+
+# orjson serializes responses 2-5x faster than the stdlib json module
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 @app.get("/")
 async def root():
     return {"message": "Twilio-ElevenLabs Integration Server"}
 
 @app.get("/get-caller-name")
-async def get_caller_name(phone_number: str):
+async def get_caller_name(phone_number: str, response: Response = None):
     """
     Endpoint that takes a phone number and returns the caller's name from Supabase.
     Example: /get-caller-name?phone_number=+1234567890
     """
     # Normalize the phone number
-    normalized_number = phone_number.strip().replace(" ", "")
-    if not normalized_number.startswith("+"):
-        normalized_number = "+" + normalized_number
-    
+    normalized_number = norm_phone(phone_number)
+
+    if response is not None:
+        response.headers["Cache-Control"] = CACHE_CONTROL_SWR
+
+    cached_name = NAME_CACHE.get(normalized_number)
+    if cached_name is not None:
+        return cached_name
+
     try:
         # Query Supabase for the user with the matching phone_number
-        response = supabase.table("users").select("user_name").eq("phone_number", normalized_number).execute()
-        
+        user_response = await sb(lambda: supabase.table("users").select("user_name").eq("phone_number", normalized_number).execute())
+
         # Check if a user was found
-        if response.data and len(response.data) > 0:
+        if user_response.data and len(user_response.data) > 0:
             # Return the user_name from the first matching row
-            return {"name": response.data[0]["user_name"]}
+            result = {"name": user_response.data[0]["user_name"]}
+            NAME_CACHE[normalized_number] = result
+            return result
         else:
             # Return a default name for unknown callers
             return {"name": "Valued Customer"}
-    
+
     except Exception as e:
-        print(f"Error querying Supabase: {str(e)}")
+        log.error("Error querying Supabase: %s", e)
         # Fallback to default name in case of an error
         return {"name": "Valued Customer"}
 
+# The inbound-call TwiML only varies by hostname, so build it once per host
+# instead of re-running twilio's XML DOM build + stringify per call
+_TWIML_CACHE: dict[str, str] = {}
+
+def twiml_for(host: str) -> str:
+    if host not in _TWIML_CACHE:
+        response = VoiceResponse()
+        connect = Connect()
+        connect.stream(url=f"wss://{host}/media-stream")
+        response.append(connect)
+        _TWIML_CACHE[host] = str(response)
+    return _TWIML_CACHE[host]
+
 @app.post("/twilio/inbound_call")
 async def handle_incoming_call(request: Request):
     form_data = await request.form()
     call_sid = form_data.get("CallSid", "Unknown")
     from_number = form_data.get("From", "Unknown")
-    print(f"Incoming call: CallSid={call_sid}, From={from_number}")
+    log.info("Incoming call: CallSid=%s, From=%s", call_sid, from_number)
 
-    response = VoiceResponse()
-    connect = Connect()
-    connect.stream(url=f"wss://{request.url.hostname}/media-stream")
-    response.append(connect)
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    return HTMLResponse(content=twiml_for(request.url.hostname), media_type="application/xml")
+
+def build_dynamic_variables(profile):
+    """
+    Flattens a loved-one profile into the dynamic_variables dict the
+    ElevenLabs agent expects. Binds each sub-dict to a local once instead
+    of re-walking chained .get() calls for every key.
+    """
+    caller = profile.get("caller") or {}
+    loved_one = profile.get("loved_one") or {}
+    meds = profile.get("medications") or {}
+    call_settings = profile.get("call_settings") or {}
+    checklist = call_settings.get("checklist") or {}
+    notifications = profile.get("notifications") or {}
+
+    return {
+        # Caller information
+        "caller_name": caller.get("name", "there"),
+
+        # Loved one information
+        "loved_one_name": loved_one.get("name", ""),
+        "loved_one_nickname": loved_one.get("nickname", ""),
+        "loved_one_gender": loved_one.get("gender", ""),
+        "loved_one_relationship": loved_one.get("relationship", ""),
+
+        # Medication information - in a simple, direct format
+        "has_medications": str(meds.get("has_medications", False)).lower(),
+        "morning_medications": meds.get("morning_medications", "none"),
+        "afternoon_medications": meds.get("afternoon_medications", "none"),
+        "evening_medications": meds.get("evening_medications", "none"),
+        "current_time_medications": meds.get("current_time_medications", "none"),
+        "needs_medication_now": meds.get("needs_medication_now", "false"),
+
+        # Call settings
+        "call_length": call_settings.get("length", "medium"),
+        "voice_preference": call_settings.get("voice", "female"),
+        "call_frequency": call_settings.get("frequency", "daily check ins"),
+
+        # Checklist items - as simple boolean strings
+        "check_medications": str(checklist.get("medication_reminders", False)).lower(),
+        "check_sleep": str(checklist.get("sleep_quality", False)).lower(),
+        "check_mood": str(checklist.get("mood_check", False)).lower(),
+        "check_appointments": str(checklist.get("upcoming_appointments", False)).lower(),
+
+        # Notification settings
+        "notify_daily_summary": str(notifications.get("daily_summary", False)).lower(),
+        "notify_missed_calls": str(notifications.get("missed_calls", False)).lower(),
+        "notify_low_sentiment": str(notifications.get("low_sentiment", False)).lower()
+    }
 
 @app.post("/twilio/conversation-initiation")
 async def handle_conversation_initiation(request: Request):
     try:
         # Parse the request body
         data = await request.json()
-        print(f"Received conversation initiation: {data}")
+        log.debug("Received conversation initiation: %s", data)
 
         # Extract the caller's phone number
         caller_id = data.get("caller_id", None)
 
         if not caller_id:
-            print("Caller ID not found in request")
+            log.warning("Caller ID not found in request")
             return {
                 "type": "conversation_initiation_client_data",
                 "dynamic_variables": {
@@ -98,73 +254,28 @@ async def handle_conversation_initiation(request: Request):
                 }
             }
 
-        # Fetch the loved one's profile using the query parameter format
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://520d-83-135-183-58.ngrok-free.app/get-loved-one-profile?phone_number={caller_id}"
-            )
-            response.raise_for_status()
-            profile = response.json()
-            
-            # Print the full profile data for debugging
-            print(f"Retrieved profile data: {profile}")
-            
-            # Check if there was an error
-            if "error" in profile:
-                print(f"Error in profile data: {profile['error']}")
-                return {
-                    "type": "conversation_initiation_client_data",
-                    "dynamic_variables": {
-                        "caller_name": profile.get("caller_name", "there")
-                    }
+        # Fetch the loved one's profile directly, like initiate_call does,
+        # instead of round-tripping through our own public URL
+        profile = await get_loved_one_profile_query(caller_id)
+
+        # Print the full profile data for debugging
+        log.debug("Retrieved profile data: %s", profile)
+
+        # Check if there was an error
+        if "error" in profile:
+            log.warning("Error in profile data: %s", profile["error"])
+            return {
+                "type": "conversation_initiation_client_data",
+                "dynamic_variables": {
+                    "caller_name": profile.get("caller_name", "there")
                 }
-            
-            # Create dynamic variables for the conversation in a format that's easy for the agent to use
-            dynamic_variables = {
-                # Caller information
-                "caller_name": profile.get("caller", {}).get("name", "there"),
-                
-                # Loved one information
-                "loved_one_name": profile.get("loved_one", {}).get("name", ""),
-                "loved_one_nickname": profile.get("loved_one", {}).get("nickname", ""),
-                "loved_one_gender": profile.get("loved_one", {}).get("gender", ""),
-                "loved_one_relationship": profile.get("loved_one", {}).get("relationship", ""),
-                
-                # Medication information - in a simple, direct format
-                "has_medications": str(profile.get("medications", {}).get("has_medications", False)).lower(),
-                "morning_medications": profile.get("medications", {}).get("morning_medications", "none"),
-                "afternoon_medications": profile.get("medications", {}).get("afternoon_medications", "none"),
-                "evening_medications": profile.get("medications", {}).get("evening_medications", "none"),
-                
-                # Call settings
-                "call_length": profile.get("call_settings", {}).get("length", "medium"),
-                "voice_preference": profile.get("call_settings", {}).get("voice", "female"),
-                "call_frequency": profile.get("call_settings", {}).get("frequency", "daily check ins"),
-                
-                # Checklist items - as simple boolean strings
-                "check_medications": str(profile.get("call_settings", {}).get("checklist", {}).get("medication_reminders", False)).lower(),
-                "check_sleep": str(profile.get("call_settings", {}).get("checklist", {}).get("sleep_quality", False)).lower(),
-                "check_mood": str(profile.get("call_settings", {}).get("checklist", {}).get("mood_check", False)).lower(),
-                "check_appointments": str(profile.get("call_settings", {}).get("checklist", {}).get("upcoming_appointments", False)).lower(),
-                
-                # Notification settings
-                "notify_daily_summary": str(profile.get("notifications", {}).get("daily_summary", False)).lower(),
-                "notify_missed_calls": str(profile.get("notifications", {}).get("missed_calls", False)).lower(),
-                "notify_low_sentiment": str(profile.get("notifications", {}).get("low_sentiment", False)).lower()
             }
 
-            # Add current time information to help with medication timing
-            now = datetime.datetime.now()
-            hour = now.hour
-            
-            if 5 <= hour < 12:
-                time_of_day = "morning"
-            elif 12 <= hour < 17:
-                time_of_day = "afternoon"
-            else:
-                time_of_day = "evening"
-                
-            dynamic_variables["time_of_day"] = time_of_day
+        # Create dynamic variables for the conversation in a format that's easy for the agent to use
+        dynamic_variables = build_dynamic_variables(profile)
+
+        # Add current time information to help with medication timing
+        dynamic_variables["time_of_day"] = _TIME_OF_DAY[datetime.datetime.now().hour]
 
         return {
             "type": "conversation_initiation_client_data",
@@ -172,8 +283,7 @@ async def handle_conversation_initiation(request: Request):
         }
 
     except Exception as e:
-        print(f"Error in conversation initiation webhook: {str(e)}")
-        traceback.print_exc()
+        log.exception("Error in conversation initiation webhook: %s", e)
         # Fallback response if there's an error
         return {
             "type": "conversation_initiation_client_data",
@@ -189,44 +299,61 @@ async def handle_call_end(request: Request):
     Extracts the transcript, call duration, happiness level, and call direction from the payload and saves it to Supabase.
     """
     # Log the headers
-    print(f"Request headers: {request.headers}")
+    log.debug("Request headers: %s", request.headers)
 
     # Get the signature from the headers
     signature_header = request.headers.get("ElevenLabs-Signature")
     if not signature_header:
-        print("Missing ElevenLabs-Signature header")
+        log.warning("Missing ElevenLabs-Signature header")
         raise HTTPException(status_code=401, detail="Missing ElevenLabs-Signature header")
 
     # Parse the ElevenLabs-Signature header (format: t=<timestamp>,v0=<signature>)
-    signature_parts = dict(part.split("=") for part in signature_header.split(","))
-    timestamp = signature_parts.get("t")
-    provided_signature = signature_parts.get("v0")
+    # with a single scan instead of building an intermediate dict
+    timestamp = None
+    provided_signature = None
+    for part in signature_header.split(","):
+        key, _, value = part.partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v0":
+            provided_signature = value
     if not timestamp or not provided_signature:
-        print("Invalid ElevenLabs-Signature format")
+        log.warning("Invalid ElevenLabs-Signature format")
         raise HTTPException(status_code=401, detail="Invalid ElevenLabs-Signature format")
 
+    # Reject stale or garbage timestamps before doing any HMAC work; this is
+    # cheap on the happy path and also closes the replay window
+    try:
+        if abs(time.time() - int(timestamp)) > 300:
+            raise ValueError("timestamp outside tolerance")
+    except ValueError:
+        log.warning("Stale or invalid timestamp in ElevenLabs-Signature")
+        raise HTTPException(status_code=401, detail="Stale or invalid timestamp")
+
     # Get the raw request body
     body = await request.body()
-    body_str = body.decode("utf-8")
-    print(f"Request body: {body_str}")
 
     # Compute the HMAC signature using timestamp and body (format: <timestamp>.<body>)
-    message = f"{timestamp}.{body_str}".encode("utf-8")
-    expected_signature = hmac.new(
-        key=WEBHOOK_SECRET.encode("utf-8"),
-        msg=message,
-        digestmod=hashlib.sha256
-    ).hexdigest()
-    print(f"Computed signature: {expected_signature}")
-    print(f"Provided signature: {provided_signature}")
-
-    if not hmac.compare_digest(expected_signature, provided_signature):
-        print("Invalid signature")
+    h = _HMAC_TEMPLATE.copy()
+    h.update(f"{timestamp}.".encode("utf-8"))
+    h.update(body)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Computed signature: %s", h.hexdigest())
+        log.debug("Provided signature: %s", provided_signature)
+
+    try:
+        provided_digest = bytes.fromhex(provided_signature)
+    except ValueError:
+        log.warning("Invalid signature encoding")
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    if not hmac.compare_digest(h.digest(), provided_digest):
+        log.warning("Invalid signature")
         raise HTTPException(status_code=401, detail="Invalid signature")
 
     # Parse the request body
-    data = json.loads(body_str)
-    print(f"Received call end notification: {data}")
+    data = orjson.loads(body)
+    log.debug("Received call end notification: %s", data)
 
     # Extract conversation_id and caller_id from the nested structure
     conversation_id = data.get("data", {}).get("conversation_id")
@@ -237,25 +364,23 @@ async def handle_call_end(request: Request):
         caller_id = data.get("conversation_initiation_client_data", {}).get("dynamic_variables", {}).get("system__caller_id")
 
     if not conversation_id or not caller_id:
-        print("Missing conversation_id or caller_id in call end notification")
+        log.warning("Missing conversation_id or caller_id in call end notification")
         return {"status": "error", "message": "Missing required fields"}
 
     try:
         # Extract the transcript directly from the payload
         transcript = data.get("data", {}).get("transcript", [])
         if not transcript:
-            print("No transcript found in payload")
+            log.warning("No transcript found in payload")
             return {"status": "error", "message": "No transcript available"}
 
-        # Format the transcript as a string
-        transcript_lines = []
-        for entry in transcript:
-            role = entry.get("role", "unknown")
-            message = entry.get("message", "")
-            if message:  # Only include entries with a message
-                transcript_lines.append(f"{role.capitalize()}: {message}")
-        full_transcript = "\n".join(transcript_lines)
-        print(f"Formatted transcript:\n{full_transcript}")
+        # Format the transcript in a single pass, skipping entries without a message
+        full_transcript = "\n".join(
+            f"{_ROLE_CAP.get((role := entry.get('role', 'unknown')), role.capitalize())}: {message}"
+            for entry in transcript
+            if (message := entry.get("message"))
+        )
+        log.debug("Formatted transcript:\n%s", full_transcript)
 
         # Extract the additional data
         metadata = data.get("data", {}).get("metadata", {})
@@ -269,20 +394,21 @@ async def handle_call_end(request: Request):
         call_direction = phone_call.get("direction")
 
         # Look up the user_id based on the phone number
-        normalized_number = caller_id.strip().replace(" ", "")
-        if not normalized_number.startswith("+"):
-            normalized_number = "+" + normalized_number
+        normalized_number = norm_phone(caller_id)
 
-        user_response = supabase.table("users").select("id").eq("phone_number", normalized_number).execute()
-        if user_response.data and len(user_response.data) > 0:
-            user_id = user_response.data[0]["id"]
-        else:
-            # If the user doesn't exist, create a new user
-            new_user = supabase.table("users").insert({
-                "phone_number": normalized_number,
-                "user_name": "Unknown User"
-            }).execute()
-            user_id = new_user.data[0]["id"]
+        user_id = USER_ID_CACHE.get(normalized_number)
+        if user_id is None:
+            user_response = await sb(lambda: supabase.table("users").select("id").eq("phone_number", normalized_number).execute())
+            if user_response.data and len(user_response.data) > 0:
+                user_id = user_response.data[0]["id"]
+            else:
+                # If the user doesn't exist, create a new user
+                new_user = await sb(lambda: supabase.table("users").insert({
+                    "phone_number": normalized_number,
+                    "user_name": "Unknown User"
+                }).execute())
+                user_id = new_user.data[0]["id"]
+            USER_ID_CACHE[normalized_number] = user_id
 
         # Insert the transcript and additional data into the conversations table
         conversation_data = {
@@ -293,93 +419,156 @@ async def handle_call_end(request: Request):
             "happiness_level": happiness_level,
             "call_direction": call_direction
         }
-        supabase.table("conversations").insert(conversation_data).execute()
-        print(f"Transcript and additional data saved to Supabase for user_id: {user_id}")
+        await sb(lambda: supabase.table("conversations").insert(conversation_data).execute())
+        log.info("Transcript and additional data saved to Supabase for user_id: %s", user_id)
 
         return {"status": "success", "message": "Transcript and additional data saved"}
 
     except Exception as e:
-        print(f"Error saving data to Supabase: {str(e)}")
+        log.exception("Error saving data to Supabase: %s", e)
         return {"status": "error", "message": str(e)}
     
 @app.get("/get-loved-one-profile")
-async def get_loved_one_profile_query(phone_number: str):
+async def get_loved_one_profile_query(phone_number: str, response: Response = None):
     """
-    Endpoint that takes a phone number as a query parameter and returns a clean, 
+    Endpoint that takes a phone number as a query parameter and returns a clean,
     structured profile for the agent to use.
+
+    Cached profiles are served stale-while-revalidate: entries older than
+    PROFILE_FRESH_SECONDS come back immediately while a background task
+    refreshes them. Error results are never cached.
     """
     # Normalize the phone number
-    normalized_number = phone_number.strip().replace(" ", "")
-    if not normalized_number.startswith("+"):
-        normalized_number = "+" + normalized_number
-    
+    normalized_number = norm_phone(phone_number)
+
+    if response is not None:
+        response.headers["Cache-Control"] = CACHE_CONTROL_SWR
+
+    async with PROFILE_CACHE_LOCK:
+        entry = PROFILE_CACHE.get(normalized_number)
+    if entry is not None:
+        profile, fetched_at = entry
+        if time.monotonic() - fetched_at >= PROFILE_FRESH_SECONDS:
+            asyncio.create_task(_refresh_profile(normalized_number))
+        return profile
+
+    profile = await _fetch_loved_one_profile(normalized_number)
+    if "error" not in profile:
+        async with PROFILE_CACHE_LOCK:
+            PROFILE_CACHE[normalized_number] = (profile, time.monotonic())
+    return profile
+
+async def _refresh_profile(normalized_number: str):
+    # One in-flight refresh per number is enough
+    if normalized_number in _PROFILE_REFRESHING:
+        return
+    _PROFILE_REFRESHING.add(normalized_number)
     try:
-        # Query Supabase for the user with the matching phone_number
-        user_response = supabase.table("users").select("id, user_name").eq("phone_number", normalized_number).execute()
-        
-        # Check if a user was found
-        if not user_response.data or len(user_response.data) == 0:
-            print(f"User not found for phone number: {normalized_number}")
-            return {"caller_name": "Valued Customer", "error": "User not found"}
-        
-        user_id = user_response.data[0]["id"]
-        user_name = user_response.data[0]["user_name"]
-        print(f"Found user: {user_name} with id: {user_id}")
-        
-        # Get the loved one profile
-        loved_one_response = supabase.table("loved_ones").select("*").eq("user_id", user_id).execute()
-        if not loved_one_response.data or len(loved_one_response.data) == 0:
-            print(f"No loved one found for user_id: {user_id}")
-            return {
-                "caller_name": user_name,
-                "error": "No loved one profile found"
-            }
-        
-        loved_one = loved_one_response.data[0]
-        loved_one_id = loved_one["id"]
-        print(f"Found loved one: {loved_one['name']} with id: {loved_one_id}")
-        
-        # Get medications
-        medications_response = supabase.table("medications").select("*").eq("loved_one_id", loved_one_id).execute()
-        medications = medications_response.data
-        
-        # Get call preferences
-        call_prefs_response = supabase.table("call_preferences").select("*").eq("loved_one_id", loved_one_id).execute()
-        call_preferences = call_prefs_response.data[0] if call_prefs_response.data else {}
-        
-        # Get notification settings
-        notif_response = supabase.table("notification_settings").select("*").eq("loved_one_id", loved_one_id).execute()
-        notification_settings = notif_response.data[0] if notif_response.data else {}
-        
-        # Get upcoming appointments
-        appointments_response = supabase.table("consolidated_appointments").select("*").eq("loved_one_id", loved_one_id).execute()
-        appointments = appointments_response.data
-        
-        # Process medications into a cleaner format
+        profile = await _fetch_loved_one_profile(normalized_number)
+        if "error" not in profile:
+            async with PROFILE_CACHE_LOCK:
+                PROFILE_CACHE[normalized_number] = (profile, time.monotonic())
+    finally:
+        _PROFILE_REFRESHING.discard(normalized_number)
+
+async def _fetch_loved_one_profile(normalized_number: str):
+    try:
+        # Fast path: one RPC round-trip with all joins done server-side
+        # (see sql/get_loved_one_profile.sql)
+        raw = None
+        try:
+            rpc_response = await sb(lambda: supabase.rpc("get_loved_one_profile", {"p_phone": normalized_number}).execute())
+            raw = rpc_response.data
+        except Exception as rpc_error:
+            log.warning("RPC get_loved_one_profile unavailable, falling back to per-table queries: %s", rpc_error)
+
+        if raw:
+            user_row = raw.get("user")
+            if not user_row:
+                log.warning("User not found for phone number: %s", normalized_number)
+                return {"caller_name": "Valued Customer", "error": "User not found"}
+
+            user_id = user_row["id"]
+            user_name = user_row["user_name"]
+            log.info("Found user: %s with id: %s", user_name, user_id)
+
+            loved_one = raw.get("loved_one")
+            if not loved_one:
+                log.warning("No loved one found for user_id: %s", user_id)
+                return {
+                    "caller_name": user_name,
+                    "error": "No loved one profile found"
+                }
+
+            loved_one_id = loved_one["id"]
+            log.info("Found loved one: %s with id: %s", loved_one["name"], loved_one_id)
+
+            medications = raw.get("medications") or []
+            call_preferences = raw.get("call_preferences") or {}
+            notification_settings = raw.get("notification_settings") or {}
+            appointments = raw.get("appointments") or []
+        else:
+            # Fallback: the original per-table queries
+            user_response = await sb(lambda: supabase.table("users").select("id, user_name").eq("phone_number", normalized_number).execute())
+
+            # Check if a user was found
+            if not user_response.data or len(user_response.data) == 0:
+                log.warning("User not found for phone number: %s", normalized_number)
+                return {"caller_name": "Valued Customer", "error": "User not found"}
+
+            user_id = user_response.data[0]["id"]
+            user_name = user_response.data[0]["user_name"]
+            log.info("Found user: %s with id: %s", user_name, user_id)
+
+            # Get the loved one profile
+            loved_one_response = await sb(lambda: supabase.table("loved_ones").select("id,name,nickname,age_range,gender,relationship_to_user").eq("user_id", user_id).execute())
+            if not loved_one_response.data or len(loved_one_response.data) == 0:
+                log.warning("No loved one found for user_id: %s", user_id)
+                return {
+                    "caller_name": user_name,
+                    "error": "No loved one profile found"
+                }
+
+            loved_one = loved_one_response.data[0]
+            loved_one_id = loved_one["id"]
+            log.info("Found loved one: %s with id: %s", loved_one["name"], loved_one_id)
+
+            # The remaining queries only depend on loved_one_id, so fire them
+            # concurrently instead of paying four sequential round-trips
+            medications_response, call_prefs_response, notif_response, appointments_response = await asyncio.gather(
+                asyncio.to_thread(lambda: supabase.table("medications").select("medication_name,time_taken").eq("loved_one_id", loved_one_id).execute()),
+                asyncio.to_thread(lambda: supabase.table("call_preferences").select("call_length,voice_preference,call_frequency,medication_reminders,sleep_quality,mood_check,upcoming_appointments").eq("loved_one_id", loved_one_id).execute()),
+                asyncio.to_thread(lambda: supabase.table("notification_settings").select("daily_call_summary,missed_calls,low_sentiment").eq("loved_one_id", loved_one_id).execute()),
+                asyncio.to_thread(lambda: supabase.table("consolidated_appointments").select("appointment_title,appointment_date,appointment_time,frequency").eq("loved_one_id", loved_one_id).execute()),
+            )
+            medications = medications_response.data
+            call_preferences = call_prefs_response.data[0] if call_prefs_response.data else {}
+            notification_settings = notif_response.data[0] if notif_response.data else {}
+            appointments = appointments_response.data
+
+
+        # Process medications into a cleaner format; a single pass over each
+        # medication's times instead of one substring scan per bucket
         morning_meds = []
         afternoon_meds = []
         evening_meds = []
-        
+        bucket_lists = {"morning": morning_meds, "afternoon": afternoon_meds, "evening": evening_meds}
+
         for med in medications:
             med_name = med["medication_name"]
             time_taken = med.get("time_taken", [])
-            
+
             # Handle both list and string formats
             if isinstance(time_taken, list):
-                times = [t.lower() if isinstance(t, str) else str(t).lower() for t in time_taken]
+                times = {t.lower() if isinstance(t, str) else str(t).lower() for t in time_taken}
             else:
-                # If it's a string, split it into a list
-                times = [t.strip().lower() for t in str(time_taken).split(',')]
-            
-            # Create a formatted medication string with just the name (no dosage or instructions)
-            med_info = med_name
-            
-            if any('morning' in t for t in times):
-                morning_meds.append(med_info)
-            if any('afternoon' in t for t in times):
-                afternoon_meds.append(med_info)
-            if any('evening' in t for t in times):
-                evening_meds.append(med_info)
+                # If it's a string, split it into a set
+                times = {t.strip().lower() for t in str(time_taken).split(',')}
+
+            # Collect the buckets mentioned anywhere in this medication's times
+            tokens = {bucket for t in times for bucket in _MED_BUCKETS if bucket in t}
+            for bucket in tokens:
+                bucket_lists[bucket].append(med_name)
         
         # Process appointments, adding "today" if applicable
         upcoming_appointments = []
@@ -418,15 +607,9 @@ async def get_loved_one_profile_query(phone_number: str):
             })
 
         # Add current time information to help with medication timing
-        now = datetime.datetime.now()
-        
-        if 5 <= now.hour < 12:
-            time_of_day = "morning"
-        elif 12 <= now.hour < 17:
-            time_of_day = "afternoon"
-        else:
-            time_of_day = "evening"
-        
+        time_of_day = _TIME_OF_DAY[datetime.datetime.now().hour]
+
+
         # Construct a clean, simplified profile
         clean_profile = {
             "caller": {
@@ -471,21 +654,32 @@ async def get_loved_one_profile_query(phone_number: str):
             "appointments": upcoming_appointments
         }
         
-        print(f"Successfully built profile for {user_name}'s loved one {loved_one['name']}")
+        log.info("Successfully built profile for %s's loved one %s", user_name, loved_one["name"])
         return clean_profile
     
     except Exception as e:
-        print(f"Error querying Supabase: {str(e)}")
-        traceback.print_exc()  # Add full traceback for better debugging
+        log.exception("Error querying Supabase: %s", e)
         return {"caller_name": "Valued Customer", "error": str(e)}
 
+@app.post("/cache/invalidate/{phone}")
+async def invalidate_profile_cache(phone: str):
+    """
+    Drops the cached profile for a phone number. Call this after mutating
+    profile data so the next call picks up fresh values.
+    """
+    normalized_number = norm_phone(phone)
+
+    async with PROFILE_CACHE_LOCK:
+        removed = PROFILE_CACHE.pop(normalized_number, None)
+    return {"status": "success", "invalidated": removed is not None}
+
 @app.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
     await websocket.accept()
-    print("WebSocket connection opened")
+    log.info("WebSocket connection opened")
 
     audio_interface = TwilioAudioInterface(websocket)
-    eleven_labs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+    eleven_labs_client = get_eleven()
 
     try:
         conversation = Conversation(
@@ -493,31 +687,29 @@ async def handle_media_stream(websocket: WebSocket):
             agent_id=ELEVENLABS_AGENT_ID,
             requires_auth=True,
             audio_interface=audio_interface,
-            callback_agent_response=lambda text: print(f"Agent: {text}"),
-            callback_user_transcript=lambda text: print(f"User: {text}"),
+            callback_agent_response=lambda text: log.debug("Agent: %s", text),
+            callback_user_transcript=lambda text: log.debug("User: %s", text),
         )
 
         conversation.start_session()
-        print("Conversation started")
+        log.info("Conversation started")
 
         async for message in websocket.iter_text():
             if not message:
                 continue
-            await audio_interface.handle_twilio_message(json.loads(message))
+            await audio_interface.handle_twilio_message(orjson.loads(message))
 
     except WebSocketDisconnect:
-        print("WebSocket disconnected")
+        log.info("WebSocket disconnected")
     except Exception:
-        print("Error occurred in WebSocket handler:")
-        traceback.print_exc()
+        log.exception("Error occurred in WebSocket handler:")
     finally:
         try:
             conversation.end_session()
             conversation.wait_for_session_end()
-            print("Conversation ended")
+            log.info("Conversation ended")
         except Exception:
-            print("Error ending conversation session:")
-            traceback.print_exc()
+            log.exception("Error ending conversation session:")
 
 @app.get("/initiate_call/{phone_number}")
 async def initiate_call(phone_number: str, request: Request):
@@ -525,12 +717,10 @@ async def initiate_call(phone_number: str, request: Request):
     Endpoint to initiate an outbound call to a specified phone number.
     Example: /initiate_call/+1234567890
     """
-    print(f"Initiating call to phone number: {phone_number}")
+    log.info("Initiating call to phone number: %s", phone_number)
     
     # Normalize the phone number
-    normalized_number = phone_number.strip().replace(" ", "")
-    if not normalized_number.startswith("+"):
-        normalized_number = "+" + normalized_number
+    normalized_number = norm_phone(phone_number)
     
     try:
         # Get the server host for the API call
@@ -538,63 +728,22 @@ async def initiate_call(phone_number: str, request: Request):
         server_scheme = request.url.scheme
         
         # Add current time information
-        now = datetime.datetime.now()
-        hour = now.hour
-        
-        if 5 <= hour < 12:
-            time_of_day = "morning"
-        elif 12 <= hour < 17:
-            time_of_day = "afternoon"
-        else:
-            time_of_day = "evening"
-        
+        time_of_day = _TIME_OF_DAY[datetime.datetime.now().hour]
+
+
         # Use the local endpoint directly
         profile = await get_loved_one_profile_query(normalized_number)
         
         # Print the full profile data for debugging
-        print(f"Retrieved profile data: {profile}")
+        log.debug("Retrieved profile data: %s", profile)
         
         # Check if there was an error
         if "error" in profile:
-            print(f"Error in profile data: {profile['error']}")
+            log.warning("Error in profile data: %s", profile["error"])
             return {"status": "error", "message": profile['error']}
         
         # Create dynamic variables for the conversation with focus on locations and appointments
-        dynamic_variables = {
-            # Caller information
-            "caller_name": profile.get("caller", {}).get("name", "there"),
-            
-            # Loved one information
-            "loved_one_name": profile.get("loved_one", {}).get("name", ""),
-            "loved_one_nickname": profile.get("loved_one", {}).get("nickname", ""),
-            "loved_one_gender": profile.get("loved_one", {}).get("gender", ""),
-            "loved_one_relationship": profile.get("loved_one", {}).get("relationship", ""),
-            
-            # Medication information
-            "has_medications": str(profile.get("medications", {}).get("has_medications", False)).lower(),
-            "morning_medications": profile.get("medications", {}).get("morning_medications", "none"),
-            "afternoon_medications": profile.get("medications", {}).get("afternoon_medications", "none"),
-            "evening_medications": profile.get("medications", {}).get("evening_medications", "none"),
-            "current_time_medications": profile.get("medications", {}).get("current_time_medications", "none"),
-            "needs_medication_now": profile.get("medications", {}).get("needs_medication_now", "false"),
-            "time_of_day": profile.get("medications", {}).get("time_of_day", time_of_day),
-            
-            # Call settings
-            "call_length": profile.get("call_settings", {}).get("length", "medium"),
-            "voice_preference": profile.get("call_settings", {}).get("voice", "female"),
-            "call_frequency": profile.get("call_settings", {}).get("frequency", "daily check ins"),
-            
-            # Checklist items
-            "check_medications": str(profile.get("call_settings", {}).get("checklist", {}).get("medication_reminders", False)).lower(),
-            "check_sleep": str(profile.get("call_settings", {}).get("checklist", {}).get("sleep_quality", False)).lower(),
-            "check_mood": str(profile.get("call_settings", {}).get("checklist", {}).get("mood_check", False)).lower(),
-            "check_appointments": str(profile.get("call_settings", {}).get("checklist", {}).get("upcoming_appointments", False)).lower(),
-            
-            # Notification settings
-            "notify_daily_summary": str(profile.get("notifications", {}).get("daily_summary", False)).lower(),
-            "notify_missed_calls": str(profile.get("notifications", {}).get("missed_calls", False)).lower(),
-            "notify_low_sentiment": str(profile.get("notifications", {}).get("low_sentiment", False)).lower()
-        }
+        dynamic_variables = build_dynamic_variables(profile)
         
         # Add upcoming appointments information with a special focus
         appointments = profile.get("appointments", [])
@@ -624,8 +773,8 @@ async def initiate_call(phone_number: str, request: Request):
             
         dynamic_variables["time_of_day"] = time_of_day
         
-        # Initialize ElevenLabs client
-        client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+        # Shared ElevenLabs client
+        client = get_eleven()
         
         # Prepare the conversation initiation data as a dictionary
         conversation_data = {
@@ -634,7 +783,7 @@ async def initiate_call(phone_number: str, request: Request):
         }
         
         # Initiate the outbound call
-        print(f"Initiating outbound call to {normalized_number} with agent {ELEVENLABS_AGENT_ID}")
+        log.info("Initiating outbound call to %s with agent %s", normalized_number, ELEVENLABS_AGENT_ID)
         response = client.conversational_ai.twilio_outbound_call(
             agent_id=ELEVENLABS_AGENT_ID,
             agent_phone_number_id=ELEVENLABS_AGENT_PHONE_ID,
@@ -642,18 +791,17 @@ async def initiate_call(phone_number: str, request: Request):
             conversation_initiation_client_data=conversation_data
         )
         
-        print(f"Call initiated successfully: {response}")
+        log.info("Call initiated successfully: %s", response)
         # Handle the response properly - it's a custom object, not a dictionary
         try:
             call_sid = response.call_sid if hasattr(response, 'call_sid') else ""
             return {"status": "success", "call_sid": call_sid}
         except Exception as e:
-            print(f"Error handling response: {str(e)}")
+            log.error("Error handling response: %s", e)
             return {"status": "success", "message": "Call initiated, but couldn't parse callSid"}
         
     except Exception as e:
-        print(f"Error initiating call: {str(e)}")
-        traceback.print_exc()
+        log.exception("Error initiating call: %s", e)
         return {"status": "error", "message": str(e)}
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+-- Single round-trip replacement for the five sequential PostgREST queries
+-- issued by GET /get-loved-one-profile. All joins and aggregation happen
+-- server-side and the result comes back as one JSON document.
+-- Deploy via the Supabase SQL editor (or supabase db push).
+create or replace function get_loved_one_profile(p_phone text)
+returns jsonb
+language sql
+stable
+as $$
+with u as (
+    select id, user_name
+    from users
+    where phone_number = p_phone
+    limit 1
+),
+lo as (
+    select *
+    from loved_ones
+    where user_id = (select id from u)
+    limit 1
+)
+select jsonb_build_object(
+    'user', (select to_jsonb(u) from u),
+    'loved_one', (select to_jsonb(lo) from lo),
+    'medications', coalesce(
+        (select jsonb_agg(to_jsonb(m))
+         from medications m
+         where m.loved_one_id = (select id from lo)),
+        '[]'::jsonb),
+    'call_preferences', (
+        select to_jsonb(cp)
+        from call_preferences cp
+        where cp.loved_one_id = (select id from lo)
+        limit 1),
+    'notification_settings', (
+        select to_jsonb(ns)
+        from notification_settings ns
+        where ns.loved_one_id = (select id from lo)
+        limit 1),
+    'appointments', coalesce(
+        (select jsonb_agg(to_jsonb(a))
+         from consolidated_appointments a
+         where a.loved_one_id = (select id from lo)),
+        '[]'::jsonb)
+);
+$$;
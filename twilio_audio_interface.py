@@ -5,6 +5,13 @@ from fastapi import WebSocket
 from elevenlabs.conversational_ai.conversation import AudioInterface
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 
+# Coalesce outbound agent audio for up to 10 ms or ~1 KB before sending, so a
+# burst of small chunks shares one WebSocket frame's TLS+TCP+WS overhead
+# instead of paying it per chunk. Twilio accepts media payloads of any size,
+# so concatenated mu-law chunks play back identically.
+FLUSH_INTERVAL_SECONDS = 0.01
+MAX_BUFFER_BYTES = 1024
+
 
 class TwilioAudioInterface(AudioInterface):
     def __init__(self, websocket: WebSocket):
@@ -12,6 +19,8 @@ class TwilioAudioInterface(AudioInterface):
         self.input_callback = None
         self.stream_sid = None
         self.loop = asyncio.get_event_loop()
+        self._outbound_buffer = bytearray()
+        self._flush_handle = None
 
     def start(self, input_callback):
         self.input_callback = input_callback
@@ -19,15 +28,50 @@ class TwilioAudioInterface(AudioInterface):
     def stop(self):
         self.input_callback = None
         self.stream_sid = None
+        self._outbound_buffer.clear()
+        try:
+            self.loop.call_soon_threadsafe(self._cancel_flush)
+        except RuntimeError:
+            pass
 
     def output(self, audio: bytes):
         """
         This method should return quickly and not block the calling thread.
         """
-        asyncio.run_coroutine_threadsafe(self.send_audio_to_twilio(audio), self.loop)
+        asyncio.run_coroutine_threadsafe(self._buffer_audio(audio), self.loop)
 
     def interrupt(self):
-        asyncio.run_coroutine_threadsafe(self.send_clear_message_to_twilio(), self.loop)
+        asyncio.run_coroutine_threadsafe(self._clear_and_interrupt(), self.loop)
+
+    async def _buffer_audio(self, audio: bytes):
+        self._outbound_buffer.extend(audio)
+        if len(self._outbound_buffer) >= MAX_BUFFER_BYTES:
+            await self._flush_outbound_buffer()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(
+                FLUSH_INTERVAL_SECONDS,
+                lambda: asyncio.ensure_future(self._flush_outbound_buffer()),
+            )
+
+    async def _flush_outbound_buffer(self):
+        self._cancel_flush()
+        if not self._outbound_buffer:
+            return
+        audio = bytes(self._outbound_buffer)
+        self._outbound_buffer.clear()
+        await self.send_audio_to_twilio(audio)
+
+    def _cancel_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    async def _clear_and_interrupt(self):
+        # Drop any buffered audio - it's being interrupted anyway - then tell
+        # Twilio to clear what it has queued
+        self._outbound_buffer.clear()
+        self._cancel_flush()
+        await self.send_clear_message_to_twilio()
 
     async def send_audio_to_twilio(self, audio: bytes):
         if self.stream_sid: